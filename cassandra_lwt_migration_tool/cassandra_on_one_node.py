@@ -1,17 +1,34 @@
+import cProfile
+import dataclasses
 import json
 import logging
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from ipaddress import ip_address
-from typing import Dict
+from typing import Dict, List, Optional
+
+from cassandra.query import BoundStatement
 
 from .cassandra_provider import cassandra_session_for_node
 from .constants import *
+from .data_utils import datetime_to_uuid1_time
 from .data.cassandra_lwt_fetch_result import CassandraLwtFetchResult
+from .data.cassandra_parsed_proposal import CassandraParsedProposal
+from .data.cassandra_paxos_key_index import CassandraPaxosKeyIndex
 from .data.cassandra_paxos_row import CassandraPaxosRow
 from .data.cassandra_paxos_rows import CassandraPaxosRows
-from .json_helper import ClmtJsonEncoder
+from .data.cassandra_stale_paxos_key import CassandraStalePaxosKey
+from .json_helper import ClmtJsonEncoder, atomic_write
 from .options import options
+from .profiling import (
+    STAGE_DRIVER_PAGE_FETCH,
+    STAGE_JSON_DECODE,
+    STAGE_JSON_ENCODE,
+    STAGE_PROPOSAL_PARSING,
+    STAGE_ROW_CONSTRUCTION,
+    NullStageTimers,
+    StageTimers,
+)
 
 
 class CassandraSingleNodeError(RuntimeError):
@@ -30,6 +47,7 @@ class CassandraOnOneNode:
         self.node_ip = node_ip
         self.session_cm = cassandra_session_for_node(node_ip=node_ip)
         self.session = self.session_cm.__enter__()
+        self.stage_timers = StageTimers()
 
     def __del__(self):
         try:
@@ -38,59 +56,138 @@ class CassandraOnOneNode:
             self.node_print(msg=f"{e}")
             pass  # best effort.
 
+    PROFILE_FILE_PREFIX = "profile_"
+
     def call(self) -> CassandraLwtFetchResult:
         """
-        Top-level operation to be run against a given cassandra node. This mostly splits behavior
-        on the run mode chosen by the CLI.
+        Top-level operation to be run against a given cassandra node. If options.profile is set, the
+        run is wrapped in cProfile and the dump and stage timings are written to the baseline directory.
+        """
+
+        if not options.profile:
+            return self.call_unprofiled()
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError as e:
+            # Python 3.12+ only allows one active cProfile at a time across all threads.
+            self.node_print(f"cProfile unavailable, only recording stage timings: {e}")
+            profiler = None
+
+        try:
+            return self.call_unprofiled()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            try:
+                self.write_profile(profiler)
+            except OSError as e:
+                # Don't let a failure to write the profile hide the outcome of the run itself.
+                self.node_print_exc(e)
+
+    def write_profile(self, profiler: Optional[cProfile.Profile]) -> None:
+        """Writes the cProfile dump (if any) and stage timings for this node to the baseline directory."""
+
+        self.node_print(f"Stage timings: {self.stage_timers.summary()}")
+
+        if not options.baseline_directory.is_dir():
+            self.node_print(f"Not writing profile, no baseline directory at {options.baseline_directory}")
+            return
+
+        path_prefix = os.path.join(options.baseline_directory, f"{self.PROFILE_FILE_PREFIX}{self.node_name}")
+        if profiler is not None:
+            profiler.dump_stats(f"{path_prefix}.prof")
+        with atomic_write(f"{path_prefix}.json") as fd:
+            json.dump({"counts": self.stage_timers.counts, "seconds": self.stage_timers.seconds}, fd)
+
+    def call_unprofiled(self) -> CassandraLwtFetchResult:
+        """
+        Runs the operation against this node. This mostly splits behavior on the run mode chosen by the CLI.
         """
 
         result = CassandraLwtFetchResult(self.node_name, self.node_ip)
         start = datetime.utcnow()
 
+        paxos_rows: Optional[CassandraPaxosRows] = None
         if options.mode == CAPTURE_BASELINE:
-            result.outstanding_lwts = self.capture_one_baseline()
+            paxos_rows = self.capture_one_baseline()
         elif options.mode == CHECK_COMPLETION:
-            result.outstanding_lwts = self.check_completion(force_baseline_file_usage=False)
+            paxos_rows = self.check_completion(force_baseline_file_usage=False)
         elif options.mode == CHECK_BASELINE_COMPLETION:
-            result.outstanding_lwts = self.check_completion(force_baseline_file_usage=True)
+            paxos_rows = self.check_completion(force_baseline_file_usage=True)
         elif options.mode == CHECK_TARGETING_NODES:
             pass  # This is fine, since we already connected to cass.
         else:
             raise ValueError(f"Unknown mode of operations: {options.mode}")
 
+        if paxos_rows is not None:
+            result.outstanding_lwts = len(paxos_rows.rows)
+            result.stale_lwts = paxos_rows.stale_rows
+
         result.succeeded = True
         result.operation_time_ms = int((datetime.utcnow() - start).total_seconds() * 1000)
 
         return result
 
-    def capture_one_baseline(self) -> int:
+    def capture_one_baseline(self) -> CassandraPaxosRows:
         """
         Writes a file with all the open LWTs from the system.paxos table to options.baseline_directory.
+        If options.max_ballot_age_hours is set, LWTs with older ballots are only counted as stale.
 
-        :return: The number of LWTs written
+        :return: The LWTs written
         """
         self.node_print("Capturing baseline")
-        paxos_rows = self.retrieve_all_lwts()
+
+        stale_before = None
+        if options.max_ballot_age_hours is not None:
+            stale_before = datetime.utcnow() - timedelta(hours=options.max_ballot_age_hours)
+
+        paxos_rows = self.retrieve_all_lwts(stale_before=stale_before)
 
         path = os.path.join(options.baseline_directory, f"{self.node_name}.json")
-        with open(path, "w") as fd:
+        with atomic_write(path) as fd, self.stage_timers.measure(STAGE_JSON_ENCODE):
             json.dump(paxos_rows.to_json(), fd, cls=ClmtJsonEncoder)
 
-        return len(paxos_rows.rows)
+        if stale_before is not None:
+            self.write_stale_keys(paxos_rows, f"{self.STALE_FILE_PREFIX}{self.node_name}.json")
+            self.node_print(f"{paxos_rows.stale_rows} stale rows with ballots before {stale_before} skipped.")
+
+        return paxos_rows
 
     UPDATE_FILE_PREFIX = "update_"
+    STALE_FILE_PREFIX = "stale_"
 
-    def check_completion(self, force_baseline_file_usage: bool) -> int:
+    def write_stale_keys(self, paxos_rows: CassandraPaxosRows, file_name: str) -> None:
+        """
+        Writes the keys and ballots of the rows left out of paxos_rows as stale to a separate file in
+        options.baseline_directory, so operators can inspect what the ballot window excluded.
+        """
+
+        path = os.path.join(options.baseline_directory, file_name)
+        with atomic_write(path) as fd, self.stage_timers.measure(STAGE_JSON_ENCODE):
+            json.dump(
+                {
+                    "stale_before": paxos_rows.stale_before.isoformat() if paxos_rows.stale_before else None,
+                    "rows": [stale_key.to_json() for stale_key in paxos_rows.stale_keys],
+                },
+                fd,
+                cls=ClmtJsonEncoder,
+            )
+
+    def check_completion(self, force_baseline_file_usage: bool) -> CassandraPaxosRows:
         """
         Retrieves the current LWTs (paxos entries) and compares with the update baseline file
         (if present and force_baseline_file_usage is not True) or with the original baseline file
         contents to find the outstanding entries. The outstanding entries are stored in a separate
         updated cache to make this faster to run.
 
-        This function expects the baseline directory and appropriate baseline files to exist.
+        This function expects the baseline directory and appropriate baseline files to exist. Only baseline
+        keys are compared, so rows a ballot window left out of the baseline are never considered and checks
+        report no stale rows of their own.
 
         :param force_baseline_file_usage: Whether to ignore the incremental cache file.
-        :return: The number of LWTs outstanding.
+        :return: The LWTs outstanding.
         """
 
         self.node_print(
@@ -107,17 +204,21 @@ class CassandraOnOneNode:
             if not force_baseline_file_usage and os.path.exists(updated_baseline_path)
             else baseline_path
         )
-        with open(path_to_read, "r") as fd:
+        with open(path_to_read, "r") as fd, self.stage_timers.measure(STAGE_JSON_DECODE):
             baseline_state = CassandraPaxosRows.from_json(json.load(fd))
 
         if baseline_state is None:
             raise RuntimeError(f"Could not load baseline from {baseline_path}")
         if len(baseline_state.rows) == 0:
             self.node_print("Baseline captures no LWTs, so nothing to do.")
-            return 0
+            # Checks report no stale rows; the baseline's stale_rows belongs to the capture.
+            return dataclasses.replace(baseline_state, stale_rows=0)
 
-        # Retrieve a fresh snapshot of current LWTs.
-        captured_rows = self.retrieve_all_lwts()
+        # Retrieve a fresh snapshot of current LWTs, keeping only rows that are in the baseline. Ballots only
+        # move forward, so these are never older than the baseline's own window and need no stale test.
+        captured_rows = self.retrieve_all_lwts(
+            key_index=CassandraPaxosKeyIndex.from_rows(baseline_state.rows.values())
+        )
         outstanding_rows: Dict[str, CassandraPaxosRow] = {}
 
         # determine set of baseline LWTs that are still running -- LWTs are finished if one of the following is true:
@@ -130,14 +231,19 @@ class CassandraOnOneNode:
             if matched_row is not None and matched_row.in_progress_ballot == row.in_progress_ballot:
                 outstanding_rows[matched_row.map_key] = matched_row
 
-        outstanding_state = CassandraPaxosRows(as_of=captured_rows.as_of, rows=outstanding_rows)
+        outstanding_state = CassandraPaxosRows(
+            as_of=captured_rows.as_of,
+            rows=outstanding_rows,
+            stale_before=baseline_state.stale_before,
+        )
 
         # Write an updated set of LWTs to a cache file to save time in subsequent runs.
-        with open(updated_baseline_path, "w") as fd:
+        # Written atomically: checks always prefer this file, so a truncated one would break every later check.
+        with atomic_write(updated_baseline_path) as fd, self.stage_timers.measure(STAGE_JSON_ENCODE):
             json.dump(outstanding_state.to_json(), fd, cls=ClmtJsonEncoder)
 
         self.node_print(f"{len(outstanding_state.rows)} rows still outstanding.")
-        return len(outstanding_state.rows)
+        return outstanding_state
 
     def raise_if_not_connected_to_ip(self):
         """
@@ -168,11 +274,24 @@ class CassandraOnOneNode:
         if result_set.one() is not None:
             raise CassandraSingleNodeError(f"Unexpected second system.local row.")
 
-    def retrieve_all_lwts(self) -> CassandraPaxosRows:
-        """Fetches all open LWTs on this node from the system.paxos table."""
+    def retrieve_all_lwts(
+        self,
+        key_index: Optional[CassandraPaxosKeyIndex] = None,
+        stale_before: Optional[datetime] = None,
+    ) -> CassandraPaxosRows:
+        """
+        Fetches all open LWTs on this node from the system.paxos table.
+
+        :param key_index: If given, rows whose key is not in the index are skipped before parsing.
+        :param stale_before: If given, rows whose in_progress_ballot (or proposal_ballot, if there is none)
+            predates this naive UTC time are only recorded in stale_keys, not parsed or returned.
+        :return: The open LWTs, keyed by map_key.
+        """
 
         start_time = datetime.utcnow()
         paxos_rows: Dict[str, CassandraPaxosRow] = {}
+        # Compare raw timeuuid timestamps so each row's ballot needn't be converted to a datetime.
+        stale_before_time = datetime_to_uuid1_time(stale_before) if stale_before is not None else None
 
         column_names = [
             "row_key",
@@ -190,23 +309,75 @@ class CassandraOnOneNode:
 
         stmt = self.session.prepare(query_str).bind(tuple())
 
-        rows = self.session.execute(stmt)
-        for row in self.session.execute(stmt):
-            # We only care about non-null proposal rows.
-            if row.proposal_ballot is not None:
-                paxos_row: CassandraPaxosRow = CassandraPaxosRow.from_cassandra_row(row)
-                if not paxos_row.parsed_proposal.is_empty:
-                    paxos_rows[paxos_row.map_key] = paxos_row
+        stale_keys: List[CassandraStalePaxosKey] = []
+        self.collect_lwts(stmt, paxos_rows, stale_keys, key_index, stale_before_time)
 
         delta = (datetime.utcnow() - start_time).total_seconds() * 1000
         self.node_print(f"Finished executing in {delta:.0f}ms: {query_str}")
 
-        return CassandraPaxosRows(as_of=start_time, rows=paxos_rows)
+        return CassandraPaxosRows(
+            as_of=start_time,
+            rows=paxos_rows,
+            stale_before=stale_before,
+            stale_rows=len(stale_keys),
+            stale_keys=stale_keys,
+        )
+
+    def collect_lwts(
+        self,
+        stmt: BoundStatement,
+        paxos_rows: Dict[str, CassandraPaxosRow],
+        stale_keys: List[CassandraStalePaxosKey],
+        key_index: Optional[CassandraPaxosKeyIndex],
+        stale_before_time: Optional[int],
+    ) -> None:
+        """
+        Runs the system.paxos query and adds each open LWT to paxos_rows, or to stale_keys if its ballot
+        predates the window. Pages are fetched explicitly so that, under --profile, driver time is recorded
+        once per page; rows that are skipped before parsing are never timed.
+
+        :param stale_before_time: timeuuid timestamp before which rows are stale, if any.
+        """
+
+        timers = self.stage_timers if options.profile else NullStageTimers()
+
+        with timers.measure(STAGE_DRIVER_PAGE_FETCH):
+            result_set = self.session.execute(stmt)
+
+        while True:
+            for row in result_set.current_rows:
+                if row.proposal_ballot is None:
+                    continue  # We only care about non-null proposal rows.
+                # Skip rows outside the key index, if any, before doing anything else with them.
+                if key_index is not None and not key_index.contains(row.row_key, row.cf_id):
+                    continue
+                if (
+                    stale_before_time is not None
+                    and (row.in_progress_ballot or row.proposal_ballot).time < stale_before_time
+                ):
+                    # Rows with an empty proposal aren't LWTs whatever their age.
+                    if not CassandraParsedProposal.is_empty_proposal(row.proposal):
+                        stale_keys.append(CassandraStalePaxosKey.from_cassandra_row(row))
+                    continue
+
+                with timers.measure(STAGE_PROPOSAL_PARSING):
+                    parsed_proposal = CassandraParsedProposal(row.proposal)
+                if parsed_proposal.is_empty:
+                    continue
+
+                with timers.measure(STAGE_ROW_CONSTRUCTION):
+                    paxos_row = CassandraPaxosRow.from_cassandra_row(row, parsed_proposal=parsed_proposal)
+                paxos_rows[paxos_row.map_key] = paxos_row
+
+            if not result_set.has_more_pages:
+                break
+            with timers.measure(STAGE_DRIVER_PAGE_FETCH):
+                result_set.fetch_next_page()
 
     def node_print(self, msg: str) -> None:
         """logs a message with the node information annotated."""
         logging.info(f"\tNode {self.node_name} [{self.node_ip}]: {msg}")
 
-    def node_print_exc(self, e: RuntimeError):
+    def node_print_exc(self, e: Exception):
         """Logs an exception with the node information annotated."""
-        logging.warning(f"{self.node_name} [{self.node_ip}]: {e}", stack_info=True)
+        logging.warning(f"{self.node_name} [{self.node_ip}]: {e}", exc_info=e)
@@ -1,14 +1,23 @@
 import logging
+import os
 import sys
-from asyncio import Future
-from concurrent.futures import ThreadPoolExecutor
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Dict, List
 
 from .cassandra_on_one_node import CassandraOnOneNode
 from .constants import *
 from .data.cassandra_lwt_fetch_result import CassandraLwtFetchResult
+from .data.cassandra_shard_results import CassandraShardResults
 from .node_ip_file import read_cass_node_ip_file
 from .options import options
+from .sharding import (
+    SHARD_FILE_PREFIX,
+    clear_shard_results,
+    filter_node_ips,
+    read_shard_results,
+    write_shard_results,
+)
 
 LOG_FORMAT = "{asctime:s} [{process:06d}] {filename: >20.20}:{lineno:<6d} {levelname:>5.5} | {message:s}"
 
@@ -30,58 +39,232 @@ def main():
 
     node_ips = read_cass_node_ip_file(options.node_ips_file_path)
 
+    if options.mode == MERGE_SHARD_RESULTS:
+        ensure_baseline_dir()
+        sys.exit(merge_shard_results(list(node_ips.keys())))
+
+    if options.shard is not None:
+        node_ips = filter_node_ips(node_ips, options.shard)
+        logging.info("Shard %s: handling %d nodes.", options.shard, len(node_ips))
+
     if options.mode == CHECK_TARGETING_NODES:
         pass  # Nothing to do here.
     elif options.mode == CAPTURE_BASELINE:
-        initialize_baseline_dir()
+        initialize_baseline_dir(list(node_ips.keys()))
     elif options.mode in (CHECK_COMPLETION, CHECK_BASELINE_COMPLETION):
         ensure_baseline_dir()
     else:
         raise ValueError(f"Unknown operation mode: {options.mode}")
 
-    with ThreadPoolExecutor() as executor:
-        futures = []
+    if options.shard is not None and options.mode != CHECK_TARGETING_NODES:
+        clear_shard_results(options.baseline_directory, options.shard)
+
+    started_at = datetime.utcnow()
+    executor = ThreadPoolExecutor()
+    futures: Dict[Future, CassandraOnOneNode] = {}
+    try:
         for node_name, node_ip in node_ips.items():
             on_one_node = CassandraOnOneNode(node_name, node_ip)
-            futures.append(executor.submit(on_one_node.call))
+            futures[executor.submit(on_one_node.call)] = on_one_node
+
+        results = verify_completion(futures)
+    finally:
+        executor.shutdown(wait=False)
 
-        verify_completion(futures)
+    if options.shard is not None and options.mode != CHECK_TARGETING_NODES:
+        path = write_shard_results(
+            options.baseline_directory,
+            options.shard,
+            CassandraShardResults(mode=options.mode, as_of=started_at, results=results),
+        )
+        logging.info("Wrote shard %s results to %s", options.shard, path)
 
+    exit_code = completion_exit_code(options.mode, results, len(futures))
+    if len(results) < len(futures):
+        # Scans that were already running when we stopped early can't be interrupted, and the interpreter
+        # joins executor threads before exiting. The answer is already known, so don't wait on them.
+        logging.shutdown()
+        sys.stdout.flush()
+        os._exit(exit_code)
 
-def verify_completion(futures: List[Future]):
-    """Tracks the completion of the executor."""
+    sys.exit(exit_code)
 
+
+def verify_completion(futures: Dict[Future, CassandraOnOneNode]) -> List[CassandraLwtFetchResult]:
+    """
+    Tracks the completion of the executor. Results are processed in the order the nodes finish, and
+    when checking completion with options.stop_when_nonzero set, any scans that have not started yet are
+    cancelled as soon as one node reports outstanding LWTs (or fails). A node whose run raises is logged
+    and recorded as a result that did not succeed.
+
+    :param futures: A dict from each submitted future to the node it runs against.
+    :returns: The results of the nodes that completed
+    """
+
+    stop_when_nonzero = options.stop_when_nonzero and options.mode in (
+        CHECK_COMPLETION,
+        CHECK_BASELINE_COMPLETION,
+    )
+    results: List[CassandraLwtFetchResult] = []
     found_error = False
-    deltat_sum = 0
     outstanding_lwts = 0
 
-    for future in futures:
-        result: CassandraLwtFetchResult = future.result()  # Wait indefinitely
+    for future in as_completed(futures):
+        try:
+            result: CassandraLwtFetchResult = future.result()
+        except Exception as e:
+            on_one_node = futures[future]
+            on_one_node.node_print_exc(e)
+            result = CassandraLwtFetchResult(on_one_node.node_name, on_one_node.node_ip)
+        results.append(result)
 
         if not result.succeeded:
             found_error = True
 
-        deltat_sum += result.operation_time_ms
         outstanding_lwts += result.outstanding_lwts
 
         logging.info("%s: %d outstanding paxos entries", result.node_name, result.outstanding_lwts)
+        logging.info(
+            "Progress: %d/%d nodes done, %d outstanding LWTs so far",
+            len(results),
+            len(futures),
+            outstanding_lwts,
+        )
+
+        if stop_when_nonzero and (found_error or outstanding_lwts > 0):
+            cancelled = sum(1 for pending in futures if pending.cancel())
+            logging.warning("Stopping early: cancelled %d pending node scans.", cancelled)
+            break
+
+    log_summary(results, len(futures))
+    return results
+
+
+def completion_exit_code(mode: str, results: List[CassandraLwtFetchResult], node_count: int) -> int:
+    """
+    Determines the process exit status. Runs where any node failed return EXIT_NODE_ERRORS, as an
+    uncaught node error used to. Otherwise, unless options.exit_status (or options.stop_when_nonzero) is
+    set this is always 0, as it was before either existed. Otherwise checks of completion return
+    EXIT_LWTS_OUTSTANDING unless every node was checked successfully and none has outstanding LWTs.
+
+    :param mode: The mode the results were produced in.
+    :param results: The results of the nodes that completed.
+    :param node_count: The number of nodes that were meant to be checked.
+    """
+
+    if any(not result.succeeded for result in results):
+        return EXIT_NODE_ERRORS
+    if not (options.exit_status or options.stop_when_nonzero):
+        return 0
+    if mode not in (CHECK_COMPLETION, CHECK_BASELINE_COMPLETION):
+        return 0
+
+    if len(results) < node_count or any(result.outstanding_lwts > 0 for result in results):
+        return EXIT_LWTS_OUTSTANDING
+
+    return 0
+
+
+def merge_shard_results(node_names: List[str]) -> int:
+    """
+    Combines the partial results written by each --shard instance into the baseline directory and logs
+    the same cluster summary a single unsharded run would. Every shard must have results, from runs in
+    the same mode with the same shard count started within options.max_shard_spread_minutes of each
+    other; otherwise the files are not from one run and can't be combined.
+
+    :param node_names: All nodes expected to be covered by the shards.
+    :returns: The exit status an unsharded run of the same mode would have had.
+    """
+
+    shard_results = read_shard_results(options.baseline_directory)
+    if len(shard_results) == 0:
+        raise RuntimeError(f"No shard results found in {options.baseline_directory}")
+
+    shard_counts = {shard.count for shard in shard_results}
+    if len(shard_counts) != 1:
+        raise RuntimeError(
+            f"Shard results from runs with differing shard counts {sorted(shard_counts)}; remove the "
+            f"{SHARD_FILE_PREFIX}*.json files left over from earlier runs in {options.baseline_directory}."
+        )
+
+    modes = {shard_result.mode for shard_result in shard_results.values()}
+    if len(modes) != 1:
+        shard_modes = ", ".join(
+            f"{shard}={shard_result.mode}" for shard, shard_result in shard_results.items()
+        )
+        raise RuntimeError(
+            f"Shard results from runs in differing modes ({shard_modes}); rerun the stale shards."
+        )
+
+    mode = modes.pop()
+    shard_count = shard_counts.pop()
+    missing_shards = sorted(set(range(shard_count)) - {shard.index for shard in shard_results})
+    if len(missing_shards) > 0:
+        # Each shard removes its file before scanning, so a missing one is still running or has failed.
+        raise RuntimeError(f"Missing results for shards {missing_shards} of {shard_count}")
+
+    as_ofs = [shard_result.as_of for shard_result in shard_results.values()]
+    spread = max(as_ofs) - min(as_ofs)
+    if spread > timedelta(minutes=options.max_shard_spread_minutes):
+        shard_times = ", ".join(
+            f"{shard}={shard_result.as_of}" for shard, shard_result in shard_results.items()
+        )
+        raise RuntimeError(
+            f"Shard runs started {spread} apart ({shard_times}), more than "
+            f"--max-shard-spread-minutes={options.max_shard_spread_minutes}; rerun the stale shards."
+        )
+
+    logging.info("Merging %s results from runs started %s to %s", mode, min(as_ofs), max(as_ofs))
+
+    results = [result for shard_result in shard_results.values() for result in shard_result.results]
+    for result in results:
+        logging.info("%s: %d outstanding paxos entries", result.node_name, result.outstanding_lwts)
+
+    missing_nodes = sorted(set(node_names) - {result.node_name for result in results})
+    if len(missing_nodes) > 0:
+        logging.warning("No results for nodes: %s", ", ".join(missing_nodes))
+
+    log_summary(results, len(node_names))
+    return completion_exit_code(mode, results, len(node_names))
+
+
+def log_summary(results: List[CassandraLwtFetchResult], node_count: int):
+    """Logs the cluster-wide summary of a run."""
+
+    found_error = any(not result.succeeded for result in results)
+    deltat_sum = sum(result.operation_time_ms for result in results)
+    outstanding_lwts = sum(result.outstanding_lwts for result in results)
+    stale_lwts = sum(result.stale_lwts for result in results)
 
     logging.info("Any errors?: %s", found_error)
-    logging.info("Average run time: %0.0fms", deltat_sum / len(futures))
+    logging.info("Nodes checked: %d/%d", len(results), node_count)
+    logging.info("Average run time: %0.0fms", deltat_sum / max(len(results), 1))
     logging.info("Total outstanding LWTs: %d", outstanding_lwts)
+    if stale_lwts > 0:
+        logging.info("Total stale LWTs outside the ballot window: %d", stale_lwts)
 
 
-def initialize_baseline_dir():
+def initialize_baseline_dir(node_names: List[str]):
     """
-    Attempts to create a new baseline directory
+    Attempts to create a new baseline directory. When running as one of several shards the directory
+    is shared, so it may already exist, but none of this shard's nodes may already have a baseline.
+
+    :param node_names: The nodes this instance will capture a baseline for.
     """
 
     try:
-        options.baseline_directory.mkdir(parents=True, exist_ok=False)
+        options.baseline_directory.mkdir(parents=True, exist_ok=options.shard is not None)
     except OSError:
         logging.error(f"Error creating baseline directory: {options.baseline_directory}")
         raise
 
+    if options.shard is not None:
+        existing = [name for name in node_names if (options.baseline_directory / f"{name}.json").exists()]
+        if len(existing) > 0:
+            raise RuntimeError(
+                f"Baseline already exists in {options.baseline_directory} for nodes: {', '.join(existing)}"
+            )
+
 
 def ensure_baseline_dir():
     """
@@ -6,3 +6,12 @@ CAPTURE_BASELINE = "captureBaseline"
 CHECK_COMPLETION = "checkCompletion"
 CHECK_BASELINE_COMPLETION = "checkBaselineCompletion"
 CHECK_TARGETING_NODES = "checkTargetingNodes"
+MERGE_SHARD_RESULTS = "mergeShardResults"
+
+# Exit status when any node's run failed, matching an uncaught exception.
+EXIT_NODE_ERRORS = 1
+
+# Exit status with --exit-status when checking completion finds outstanding LWTs, or stops before every
+# node is checked.
+# Distinct from EXIT_NODE_ERRORS and 2 (argparse usage errors).
+EXIT_LWTS_OUTSTANDING = 3
@@ -1,4 +1,7 @@
+from __future__ import annotations
+
 import dataclasses
+from typing import Any, Dict
 
 
 @dataclasses.dataclass
@@ -10,3 +13,13 @@ class CassandraLwtFetchResult:
     succeeded: bool = False
     operation_time_ms: int = 0
     outstanding_lwts: int = 0
+    stale_lwts: int = 0
+
+    def to_json(self) -> Dict[str, Any]:
+        """Converts this class to a serializable form."""
+        return dataclasses.asdict(self)
+
+    @classmethod
+    def from_json(cls, obj: Dict[str, Any]) -> CassandraLwtFetchResult:
+        """Converts this class from a serializable form."""
+        return cls(**obj)
@@ -33,6 +33,16 @@ class CassandraParsedProposal:
         self.flags = struct.unpack("B", proposal_reader.read(1))[0]
         self.is_empty = (self.flags & self.IS_EMPTY_FIELD) == 1
 
+    @classmethod
+    def is_empty_proposal(cls, proposal: bytes) -> bool:
+        """
+        Reads only the IS_EMPTY flag out of raw proposal bytes, for callers that don't need the rest.
+        The flags byte follows the 16 byte uuid and the length-prefixed partition key.
+        """
+
+        partition_key_size = proposal[16]
+        return (proposal[17 + partition_key_size] & cls.IS_EMPTY_FIELD) == 1
+
     def to_json(self):
         """Converts this class to a serializable form. We'll recreate it from the raw bytes in this case."""
         return {"raw_bytes": self.raw_bytes}
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from typing import FrozenSet, Iterable, Tuple
+from uuid import UUID
+
+from .cassandra_paxos_row import CassandraPaxosRow
+
+
+class CassandraPaxosKeyIndex:
+    """
+    A membership index over the (row_key, cf_id) pairs of a set of paxos rows, built once from a baseline.
+    It is keyed on the values the cassandra driver already returns, so a live scan can discard rows that
+    are not in the baseline without formatting a map_key or building a CassandraPaxosRow for them.
+    """
+
+    keys: FrozenSet[Tuple[bytes, UUID]]
+
+    def __init__(self, keys: Iterable[Tuple[bytes, UUID]]):
+        self.keys = frozenset(keys)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[CassandraPaxosRow]) -> CassandraPaxosKeyIndex:
+        """Builds an index over the given paxos rows."""
+        return cls((row.row_key, row.cf_id) for row in rows)
+
+    def contains(self, row_key: bytes, cf_id: UUID) -> bool:
+        """Returns whether the given paxos row key and table id are indexed."""
+        return (row_key, cf_id) in self.keys
+
+    def __len__(self) -> int:
+        return len(self.keys)
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import dataclasses
-from typing import Any, Dict, NamedTuple
+from typing import Any, Dict, NamedTuple, Optional
 from uuid import UUID
 
 from cassandra_lwt_migration_tool.data_utils import maybe_bytes, maybe_uuid
@@ -44,14 +44,22 @@ class CassandraPaxosRow:
     proposal_version: int
 
     @classmethod
-    def from_cassandra_row(cls, row: CassandraPaxosRowNamedTuple) -> CassandraPaxosRow:
+    def from_cassandra_row(
+        cls,
+        row: CassandraPaxosRowNamedTuple,
+        parsed_proposal: Optional[CassandraParsedProposal] = None,
+    ) -> CassandraPaxosRow:
         """
         Converts the named tuple the cassandra driver creates into this class.
 
         :param row: raw namedtuple
+        :param parsed_proposal: row.proposal, if the caller has already parsed it
         :return: a new class instance
         """
 
+        if parsed_proposal is None:
+            parsed_proposal = CassandraParsedProposal(row.proposal)
+
         return CassandraPaxosRow(
             row.row_key,
             row.cf_id,
@@ -59,7 +67,7 @@ class CassandraPaxosRow:
             row.most_recent_commit,
             row.most_recent_commit_at,
             row.most_recent_commit_version,
-            CassandraParsedProposal(row.proposal),
+            parsed_proposal,
             row.proposal_ballot,
             row.proposal_version,
         )
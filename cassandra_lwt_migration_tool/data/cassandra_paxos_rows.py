@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import dataclasses
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from .cassandra_paxos_row import CassandraPaxosRow
+from .cassandra_stale_paxos_key import CassandraStalePaxosKey
 
 
 @dataclasses.dataclass
@@ -12,17 +13,26 @@ class CassandraPaxosRows:
     """
     Represents a mapping from a "key" that we derive to each row from a result set. Also includes a timestamp
     the rows were fetched at.
+
+    If stale_before is set, rows whose ballot predates it were left out of rows and only counted in
+    stale_rows. Their keys are kept in stale_keys for a freshly fetched set, but are not serialized
+    with the rows; see CassandraOnOneNode.write_stale_keys.
     """
 
     as_of: datetime
     rows: Dict[str, CassandraPaxosRow]
+    stale_before: Optional[datetime] = None
+    stale_rows: int = 0
+    stale_keys: List[CassandraStalePaxosKey] = dataclasses.field(default_factory=list)
 
     def to_json(self) -> Dict[str, Any]:
-        """Converts this class to a serializable representation."""
+        """Converts this class to a serializable representation, without stale_keys."""
 
         return {
             "as_of": self.as_of.isoformat(),
             "rows": {key: row.to_json() for (key, row) in self.rows.items()},
+            "stale_before": self.stale_before.isoformat() if self.stale_before is not None else None,
+            "stale_rows": self.stale_rows,
         }
 
     @classmethod
@@ -37,4 +47,7 @@ class CassandraPaxosRows:
                     obj["rows"].items(),
                 )
             ),
+            # Baselines captured before ballot windows were supported have neither field.
+            stale_before=datetime.fromisoformat(obj["stale_before"]) if obj.get("stale_before") else None,
+            stale_rows=obj.get("stale_rows", 0),
         )
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import dataclasses
+from datetime import datetime
+from typing import Any, Dict, List
+
+from .cassandra_lwt_fetch_result import CassandraLwtFetchResult
+
+
+@dataclasses.dataclass
+class CassandraShardResults:
+    """
+    Represents the per-node results one --shard instance wrote, along with the mode it ran in and the
+    time the run started, so that results from different runs are not merged together.
+    """
+
+    mode: str
+    as_of: datetime
+    results: List[CassandraLwtFetchResult]
+
+    def to_json(self) -> Dict[str, Any]:
+        """Converts this class to a serializable representation."""
+
+        return {
+            "mode": self.mode,
+            "as_of": self.as_of.isoformat(),
+            "results": [result.to_json() for result in self.results],
+        }
+
+    @classmethod
+    def from_json(cls, obj) -> CassandraShardResults:
+        """Converts this class from a serializable representation"""
+
+        return cls(
+            mode=obj["mode"],
+            as_of=datetime.fromisoformat(obj["as_of"]),
+            results=[CassandraLwtFetchResult.from_json(result) for result in obj["results"]],
+        )
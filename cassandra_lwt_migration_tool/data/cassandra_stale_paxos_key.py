@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import dataclasses
+from typing import Any, Dict, Optional
+from uuid import UUID
+
+from cassandra_lwt_migration_tool.data_utils import uuid1_time_to_datetime
+from .cassandra_paxos_row import CassandraPaxosRowNamedTuple
+
+
+@dataclasses.dataclass
+class CassandraStalePaxosKey:
+    """
+    Identifies a paxos row left out of a capture because its ballot was older than the ballot window.
+    Only the key and ballots are kept, so the row can be inspected without storing its proposal.
+    """
+
+    row_key: bytes  # blob
+    cf_id: UUID  # uuid
+    in_progress_ballot: Optional[UUID]  # timeuuid
+    proposal_ballot: UUID  # timeuuid
+
+    @classmethod
+    def from_cassandra_row(cls, row: CassandraPaxosRowNamedTuple) -> CassandraStalePaxosKey:
+        """Extracts the key and ballots from the named tuple the cassandra driver creates."""
+        return cls(row.row_key, row.cf_id, row.in_progress_ballot, row.proposal_ballot)
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Converts this class to a serializable form, along with the time of the ballot that made it stale.
+        """
+
+        ballot = self.in_progress_ballot or self.proposal_ballot
+        return {
+            "row_key": self.row_key,
+            "cf_id": self.cf_id,
+            "in_progress_ballot": self.in_progress_ballot,
+            "proposal_ballot": self.proposal_ballot,
+            "ballot_at": uuid1_time_to_datetime(ballot.time).isoformat(),
+        }
@@ -10,3 +10,4 @@ class MigrationMode(enum.IntEnum):
     CAPTURE_BASELINE = 1
     CHECK_COMPLETION = 2
     CHECK_BASELINE_COMPLETION = 3
+    MERGE_SHARD_RESULTS = 4
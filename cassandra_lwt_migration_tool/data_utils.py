@@ -1,6 +1,10 @@
+from datetime import datetime, timedelta
 from typing import Union, overload
 from uuid import UUID
 
+# Version 1 (time) UUIDs count 100ns intervals since the start of the Gregorian calendar, not the unix epoch.
+UUID1_EPOCH = datetime(1582, 10, 15)
+
 
 @overload
 def maybe_uuid(inp: str) -> UUID: ...
@@ -44,3 +48,26 @@ def maybe_bytes(inp: Union[str, None]) -> Union[bytes, None]:
         return None
 
     return bytes.fromhex(inp)
+
+
+def datetime_to_uuid1_time(dt: datetime) -> int:
+    """
+    Converts a naive UTC datetime into the timestamp a timeuuid created at that moment would carry, so
+    that timeuuids can be compared against it without converting each one to a datetime.
+
+    :param dt: A naive UTC datetime
+    :returns: The 60-bit count of 100ns intervals since UUID1_EPOCH
+    """
+
+    return ((dt - UUID1_EPOCH) // timedelta(microseconds=1)) * 10
+
+
+def uuid1_time_to_datetime(uuid1_time: int) -> datetime:
+    """
+    Converts the timestamp embedded in a timeuuid (UUID.time) into a naive UTC datetime.
+
+    :param uuid1_time: The 60-bit count of 100ns intervals since UUID1_EPOCH
+    :returns: The equivalent naive UTC datetime
+    """
+
+    return UUID1_EPOCH + timedelta(microseconds=uuid1_time // 10)
@@ -1,5 +1,7 @@
+import contextlib
 import json
-from typing import Any
+import os
+from typing import IO, Any, Iterator, Union
 from uuid import UUID
 
 
@@ -15,3 +17,24 @@ class ClmtJsonEncoder(json.JSONEncoder):
             return str(o)
 
         return json.JSONEncoder.default(self, o)
+
+
+@contextlib.contextmanager
+def atomic_write(path: Union[str, os.PathLike]) -> Iterator[IO[str]]:
+    """
+    Context manager for writing a text file that readers see either whole or not at all. The content goes
+    to a temporary file next to path, which replaces path only once the body completes, so a process
+    exiting mid-write never leaves a truncated file behind.
+
+    :param path: The file to (over)write.
+    """
+
+    tmp_path = f"{os.fspath(path)}.tmp"
+    try:
+        with open(tmp_path, "w") as fd:
+            yield fd
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
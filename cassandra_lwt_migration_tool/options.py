@@ -1,7 +1,9 @@
 import argparse
 import getpass
 import pathlib
-from typing import Union
+from typing import Optional, Union
+
+from .sharding import Shard, parse_shard
 
 # from typing import Literal
 
@@ -11,9 +13,24 @@ from typing import Union
 #    "checkCompletion",
 #    "checkBaselineCompletion",
 #    "checkTargetingNodes",
+#    "mergeShardResults",
 # ]
 
 
+def positive_float(value: str) -> float:
+    """Parses a float for argparse, rejecting values that are not strictly positive."""
+
+    try:
+        parsed = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Not a number: {value}")
+
+    if not parsed > 0:
+        raise argparse.ArgumentTypeError(f"Must be greater than 0: {value}")
+
+    return parsed
+
+
 class ClmtOptions(argparse.Namespace):
     """
     Represents the commandline options for this program. Call populate() to fill it
@@ -25,6 +42,12 @@ class ClmtOptions(argparse.Namespace):
     baseline_directory: pathlib.Path = pathlib.Path("")
     cassandra_username: Union[str, None] = ""
     cassandra_password: Union[str, None] = ""
+    stop_when_nonzero: bool = False
+    exit_status: bool = False
+    shard: Optional[Shard] = None
+    max_shard_spread_minutes: float = 30.0
+    profile: bool = False
+    max_ballot_age_hours: Optional[float] = None
 
     def populate(self):
         """Call this to parse STDIN and populate the arguments for the program."""
@@ -37,6 +60,7 @@ class ClmtOptions(argparse.Namespace):
                 "checkCompletion",
                 "checkBaselineCompletion",
                 "checkTargetingNodes",
+                "mergeShardResults",
             ],
             help="The mode of operation to run.",
         )
@@ -65,8 +89,75 @@ class ClmtOptions(argparse.Namespace):
             help="The password to authenticate to cassandra with.",
         )
 
+        _parser.add_argument(
+            "--stop-when-nonzero",
+            "--fail-fast",
+            dest="stop_when_nonzero",
+            action="store_true",
+            help="When checking completion, cancel any pending node scans as soon as one node reports "
+            "outstanding LWTs or fails.",
+        )
+
+        _parser.add_argument(
+            "--exit-status",
+            action="store_true",
+            help="When checking completion (or merging shard results of a check), exit with status 3 "
+            "unless every node was checked and none has outstanding LWTs. Implied by --stop-when-nonzero.",
+        )
+
+        _parser.add_argument(
+            "--shard",
+            default=None,
+            help="Only handle the nodes assigned to shard i of N (e.g. 0/3), writing partial results "
+            "to the baseline directory for mergeShardResults to combine.",
+            type=parse_shard,
+        )
+
+        _parser.add_argument(
+            "--max-shard-spread-minutes",
+            default=30.0,
+            help="When merging shard results, refuse to combine shards whose runs started further apart "
+            "than this, since they can't be from the same run.",
+            type=positive_float,
+        )
+
+        _parser.add_argument(
+            "--profile",
+            action="store_true",
+            help="Profile each node run with cProfile and write per-node profile dumps and stage timings "
+            "to the baseline directory.",
+        )
+
+        _parser.add_argument(
+            "--max-ballot-age-hours",
+            default=None,
+            help="When capturing a baseline, only store LWTs whose ballot is at most this many hours older "
+            "than the capture; older ones are only recorded as stale.",
+            type=positive_float,
+        )
+
         ns = _parser.parse_args(namespace=self)
 
+        if ns.stop_when_nonzero and ns.mode not in ("checkCompletion", "checkBaselineCompletion"):
+            # A nonzero count is the normal result elsewhere, and stopping a capture leaves a partial baseline.
+            _parser.error("--stop-when-nonzero only applies to checkCompletion and checkBaselineCompletion.")
+
+        if ns.exit_status and ns.mode not in (
+            "checkCompletion",
+            "checkBaselineCompletion",
+            "mergeShardResults",
+        ):
+            _parser.error(
+                "--exit-status only applies to checkCompletion, checkBaselineCompletion and mergeShardResults."
+            )
+
+        if ns.max_ballot_age_hours is not None and ns.mode != "captureBaseline":
+            # Checks must use the window the baseline was captured with, which is stored in the baseline.
+            _parser.error("--max-ballot-age-hours only applies to captureBaseline.")
+
+        if ns.mode == "mergeShardResults":
+            return  # Merging never connects to cassandra.
+
         if not ns.cassandra_username:
             ns.cassandra_username = input("username: ").strip()
         if not ns.cassandra_password:
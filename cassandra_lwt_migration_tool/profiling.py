@@ -0,0 +1,62 @@
+"""
+Lightweight instrumentation used by the --profile option.
+"""
+
+import contextlib
+from time import perf_counter
+from typing import ContextManager, Dict, Iterator
+
+STAGE_DRIVER_PAGE_FETCH = "driver_page_fetch"
+STAGE_PROPOSAL_PARSING = "proposal_parsing"
+STAGE_ROW_CONSTRUCTION = "row_construction"
+STAGE_JSON_ENCODE = "json_encode"
+STAGE_JSON_DECODE = "json_decode"
+
+
+class StageTimers:
+    """
+    Accumulates call counts and wall time per named stage of a node run. Not thread-safe; each
+    CassandraOnOneNode owns its own instance and only uses it from the thread running it.
+    """
+
+    counts: Dict[str, int]
+    seconds: Dict[str, float]
+
+    def __init__(self):
+        self.counts = {}
+        self.seconds = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Records one occurrence of a stage that took the given number of seconds."""
+        self.counts[stage] = self.counts.get(stage, 0) + 1
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    @contextlib.contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """Context manager recording the time spent in its body against a stage."""
+
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, perf_counter() - start)
+
+    def summary(self) -> str:
+        """A one-line, human-readable rendering of all recorded stages."""
+        return ", ".join(
+            f"{stage}={self.seconds[stage] * 1000:.0f}ms/{self.counts[stage]}"
+            for stage in sorted(self.counts)
+        )
+
+
+class NullStageTimers(StageTimers):
+    """A StageTimers that records nothing, so hot loops are written once but only timed when profiling."""
+
+    _NULL_CONTEXT = contextlib.nullcontext()
+
+    def add(self, stage: str, seconds: float) -> None:
+        """Discards the measurement."""
+
+    def measure(self, stage: str) -> ContextManager[None]:
+        """Returns a reusable context manager that does nothing."""
+        return self._NULL_CONTEXT
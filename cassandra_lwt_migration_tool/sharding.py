@@ -0,0 +1,115 @@
+"""
+Helpers for splitting one fleet-wide run across several tool instances with --shard i/N.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pathlib
+import re
+from typing import Dict, NamedTuple
+
+from .data.cassandra_shard_results import CassandraShardResults
+from .json_helper import atomic_write
+
+SHARD_FILE_PREFIX = "shard_"
+SHARD_FILE_PATTERN = re.compile(r"^shard_(\d+)_of_(\d+)\.json$")
+
+
+class Shard(NamedTuple):
+    """Identifies one of `count` instances sharing a run, numbered from 0."""
+
+    index: int
+    count: int
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+def parse_shard(value: str) -> Shard:
+    """
+    Parses an "i/N" shard specifier for argparse.
+
+    :param value: The string passed on the command line.
+    :returns: The parsed Shard
+    """
+
+    match = re.fullmatch(r"(\d+)/(\d+)", value.strip())
+    if match is None:
+        raise argparse.ArgumentTypeError(f"Shard must be of the form i/N: {value}")
+
+    shard = Shard(int(match.group(1)), int(match.group(2)))
+    if shard.count < 1 or shard.index >= shard.count:
+        raise argparse.ArgumentTypeError(f"Shard index must be in [0, N): {value}")
+
+    return shard
+
+
+def node_in_shard(node_name: str, shard: Shard) -> bool:
+    """
+    Deterministically assigns a node to a shard by hashing its name, so that every instance agrees
+    on the split regardless of host or interpreter.
+    """
+
+    digest = hashlib.sha1(node_name.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % shard.count == shard.index
+
+
+def filter_node_ips(node_ips: Dict[str, str], shard: Shard) -> Dict[str, str]:
+    """Returns only the nodes from node_ips assigned to the given shard."""
+    return {name: ip for name, ip in node_ips.items() if node_in_shard(name, shard)}
+
+
+def shard_result_path(baseline_directory: pathlib.Path, shard: Shard) -> pathlib.Path:
+    """The path a shard's partial results are written to inside the baseline directory."""
+    return baseline_directory / f"{SHARD_FILE_PREFIX}{shard.index}_of_{shard.count}.json"
+
+
+def clear_shard_results(baseline_directory: pathlib.Path, shard: Shard) -> None:
+    """
+    Removes a shard's results from any earlier run, so that if this run fails before writing its own,
+    a merge sees the shard as missing rather than reusing the old results.
+    """
+
+    try:
+        os.remove(shard_result_path(baseline_directory, shard))
+    except FileNotFoundError:
+        pass
+
+
+def write_shard_results(
+    baseline_directory: pathlib.Path, shard: Shard, shard_results: CassandraShardResults
+) -> pathlib.Path:
+    """
+    Writes the results of one shard into the baseline directory, replacing any earlier run of that shard.
+
+    :returns: The path written to
+    """
+
+    path = shard_result_path(baseline_directory, shard)
+    with atomic_write(path) as fd:
+        json.dump(shard_results.to_json(), fd)
+
+    return path
+
+
+def read_shard_results(baseline_directory: pathlib.Path) -> Dict[Shard, CassandraShardResults]:
+    """
+    Reads every shard result file found in the baseline directory.
+
+    :returns: A dict from shard to the results it recorded
+    """
+
+    shard_results: Dict[Shard, CassandraShardResults] = {}
+
+    for path in sorted(baseline_directory.iterdir()):
+        match = SHARD_FILE_PATTERN.match(path.name)
+        if match is None:
+            continue
+
+        with open(path, "r") as fd:
+            shard = Shard(int(match.group(1)), int(match.group(2)))
+            shard_results[shard] = CassandraShardResults.from_json(json.load(fd))
+
+    return shard_results